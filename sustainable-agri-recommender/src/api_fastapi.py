@@ -2,70 +2,141 @@
 """
 FastAPI application that serves fertilizer recommendations.
 
-- Loads the trained RandomForestRegressor model from models/rf_baseline.pkl
+- Loads the trained HistGradientBoostingRegressor model and its feature columns from
+  models/rf_baseline.pkl once per worker at startup
+- Scores with the Treelite-compiled models/rf_baseline.so when present, else with
+  onnxruntime when models/rf_baseline.onnx exists, else with scikit-learn
 - POST /predict accepts JSON with: pH, N, P, K, organic_carbon, moisture, crop
+- POST /predict_batch accepts a JSON list of such samples and scores them in one model call
 - Returns fertilizer recommendations: N_need (ML), P_need/K_need (baseline)
 """
 
+from contextlib import asynccontextmanager
+import os
 from pathlib import Path
 import sys
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Tuple
 
-import pandas as pd
+import numpy as np
 import joblib
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
 # Ensure project root on path for module imports
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.recommender import BaselineFertilizerRecommender  # noqa: E402
-from src.generate_synthetic_data import (  # noqa: E402
-    generate_synthetic_soil_data,
-    save_data_to_csv,
-)
 
-DATA_PATH = PROJECT_ROOT / "data" / "raw" / "soil_samples_synthetic_week1.csv"
 MODEL_PATH = PROJECT_ROOT / "models" / "rf_baseline.pkl"
+ONNX_MODEL_PATH = PROJECT_ROOT / "models" / "rf_baseline.onnx"
+COMPILED_MODEL_PATH = PROJECT_ROOT / "models" / "rf_baseline.so"
+NUMERIC_FEATURES = ["pH", "N", "P", "K", "organic_carbon", "moisture"]
 
 
-def load_or_generate_dataset(data_csv_path: Path) -> pd.DataFrame:
-    data_csv_path.parent.mkdir(parents=True, exist_ok=True)
-    if not data_csv_path.exists():
-        df_generated = generate_synthetic_soil_data(n_samples=500, random_seed=42)
-        save_data_to_csv(df_generated, str(data_csv_path))
-    return pd.read_csv(data_csv_path)
+def build_crop_matrix(feature_columns: List[str], crops: List[str]) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Build crop ids and a contiguous (n_crops, n_features) one-hot matrix.
 
+    Row i holds the encoded crop columns for crops[i]; the reference (drop_first)
+    crop at id 0 is all zeros and doubles as the encoding of unseen crops.
+    """
+    crop_matrix = np.zeros((len(crops), len(feature_columns)), dtype=np.float32)
+    for crop_id, crop in enumerate(crops):
+        column_name = f"crop_{crop}"
+        if column_name in feature_columns:
+            crop_matrix[crop_id, feature_columns.index(column_name)] = 1.0
+    return {crop: crop_id for crop_id, crop in enumerate(crops)}, crop_matrix
 
-def derive_training_feature_columns(dataset: pd.DataFrame) -> List[str]:
-    feature_columns = ["pH", "N", "P", "K", "organic_carbon", "moisture", "crop"]
-    features = dataset[feature_columns].copy()
-    features = pd.get_dummies(features, columns=["crop"], drop_first=True)
-    return list(features.columns)
 
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, without FastAPI's deprecated ORJSONResponse."""
 
-app = FastAPI(title="Fertilizer Recommender API", version="0.1.0")
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
 
-# Load model
-try:
-    model = joblib.load(MODEL_PATH)
-except Exception as exc:
-    model = None
-    model_load_error = exc
-else:
-    model_load_error = None
 
-# Prepare reference training feature columns for encoding consistency
-try:
-    _dataset_for_columns = load_or_generate_dataset(DATA_PATH)
-    TRAIN_FEATURE_COLUMNS = derive_training_feature_columns(_dataset_for_columns)
-except Exception as exc:
-    TRAIN_FEATURE_COLUMNS = None
-    columns_build_error = exc
-else:
-    columns_build_error = None
+# Serving state, populated once per worker process by load_model_artifacts() at
+# startup. Workers are separate processes, so these are never shared or mutated
+# after loading.
+model = None
+model_load_error = None
+TRAIN_FEATURE_COLUMNS = None
+CROP_IDS: Dict[str, int] = {}
+CROP_MATRIX = np.zeros((0, 0), dtype=np.float32)
+NUMERIC_IDX: List[int] = []
+onnx_session = None
+compiled_predictor = None
+
+
+def load_model_artifacts() -> None:
+    """Load the model bundle (and compiled/ONNX predictors, if exported) into module state."""
+    global model, model_load_error, TRAIN_FEATURE_COLUMNS, CROP_IDS, CROP_MATRIX, NUMERIC_IDX
+    global onnx_session, compiled_predictor
+
+    # Load model and the training feature columns saved alongside it
+    try:
+        bundle = joblib.load(MODEL_PATH)
+        model = bundle["model"]
+        TRAIN_FEATURE_COLUMNS = bundle["feature_columns"]
+        crops = bundle["crops"]
+    except Exception as exc:
+        model = None
+        TRAIN_FEATURE_COLUMNS = None
+        model_load_error = exc
+        return
+
+    model_load_error = None
+    CROP_IDS, CROP_MATRIX = build_crop_matrix(TRAIN_FEATURE_COLUMNS, crops)
+    NUMERIC_IDX = [TRAIN_FEATURE_COLUMNS.index(name) for name in NUMERIC_FEATURES]
+
+    # Prefer the ONNX export for inference; the scikit-learn model remains the fallback
+    onnx_session = None
+    if ort is not None and ONNX_MODEL_PATH.exists():
+        try:
+            # One intra-op thread per session: the server already runs one worker per core
+            session_options = ort.SessionOptions()
+            session_options.intra_op_num_threads = 1
+            onnx_session = ort.InferenceSession(
+                str(ONNX_MODEL_PATH), sess_options=session_options, providers=["CPUExecutionProvider"]
+            )
+        except Exception:
+            onnx_session = None
+
+    # The compiled shared library is the fastest backend and takes precedence
+    compiled_predictor = None
+    if tl2cgen is not None and COMPILED_MODEL_PATH.exists():
+        try:
+            compiled_predictor = tl2cgen.Predictor(str(COMPILED_MODEL_PATH), nthread=1)
+        except Exception:
+            compiled_predictor = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    load_model_artifacts()
+    yield
+
+
+app = FastAPI(
+    title="Fertilizer Recommender API",
+    version="0.1.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
 
 baseline_recommender = BaselineFertilizerRecommender()
 
@@ -88,43 +159,95 @@ class Recommendation(BaseModel):
 
 
 @app.get("/")
-def read_root() -> Dict[str, Any]:
+async def read_root() -> Dict[str, Any]:
     return {"status": "ok", "model_loaded": model is not None}
 
 
-@app.post("/predict", response_model=Recommendation)
-def predict(sample: SoilSample) -> Recommendation:
+def encode_samples(samples: List[SoilSample]) -> np.ndarray:
+    """Build the (n_samples, n_features) model input aligned to training columns."""
+    # Training crops are lowercase; unseen crops map to id 0, the all-zero reference row
+    crop_ids = np.fromiter(
+        (CROP_IDS.get(sample.crop.lower(), 0) for sample in samples), dtype=np.int64, count=len(samples)
+    )
+    features = CROP_MATRIX[crop_ids]
+    features[:, NUMERIC_IDX] = [
+        [sample.pH, sample.N, sample.P, sample.K, sample.organic_carbon, sample.moisture]
+        for sample in samples
+    ]
+    return features
+
+
+def predict_n_need(features: np.ndarray) -> np.ndarray:
+    """Predict N requirement for a float32 (n_samples, n_features) matrix."""
+    if compiled_predictor is not None:
+        return compiled_predictor.predict(tl2cgen.DMatrix(features)).ravel()
+    if onnx_session is not None:
+        return onnx_session.run(None, {"input": features})[0].ravel()
+    return model.predict(features)
+
+
+def build_recommendation(sample: SoilSample, n_need_pred: float) -> Dict[str, Any]:
+    """Combine the ML N prediction with baseline P/K needs and pH warning."""
+    baseline_recs = baseline_recommender.recommend_for_row(sample.model_dump())
+
+    # Plain dict matching Recommendation, serialized without response model validation
+    return {
+        "N_need": max(0.0, float(n_need_pred)),
+        "P_need": float(baseline_recs.get("P_need_kg_ha", 0.0)),
+        "K_need": float(baseline_recs.get("K_need_kg_ha", 0.0)),
+        "ph_warning": baseline_recs.get("ph_warning"),
+    }
+
+
+@app.post("/predict", responses={200: {"model": Recommendation}})
+async def predict(sample: SoilSample) -> FastJSONResponse:
     if model is None:
         raise HTTPException(status_code=500, detail=f"Model not loaded: {model_load_error}")
-    if TRAIN_FEATURE_COLUMNS is None:
-        raise HTTPException(status_code=500, detail=f"Feature columns unavailable: {columns_build_error}")
 
     # Build model features aligned to training columns
-    input_df = pd.DataFrame([{**sample.dict()}])
-    input_features = input_df[["pH", "N", "P", "K", "organic_carbon", "moisture", "crop"]].copy()
-    input_features = pd.get_dummies(input_features, columns=["crop"], drop_first=True)
-    input_features = input_features.reindex(columns=TRAIN_FEATURE_COLUMNS, fill_value=0.0)
+    x = CROP_MATRIX[[CROP_IDS.get(sample.crop.lower(), 0)]]
+    x[0, NUMERIC_IDX] = [sample.pH, sample.N, sample.P, sample.K, sample.organic_carbon, sample.moisture]
 
     # Predict N requirement
     try:
-        n_need_pred = float(model.predict(input_features)[0])
+        n_need_pred = float(predict_n_need(x)[0])
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}")
 
-    # Baseline for P/K and warning
-    baseline_recs = baseline_recommender.recommend_for_row(sample.dict())
+    return FastJSONResponse(build_recommendation(sample, n_need_pred))
 
-    return Recommendation(
-        N_need=max(0.0, n_need_pred),
-        P_need=float(baseline_recs.get("P_need_kg_ha", 0.0)),
-        K_need=float(baseline_recs.get("K_need_kg_ha", 0.0)),
-        ph_warning=baseline_recs.get("ph_warning") or None,
-    )
+
+@app.post("/predict_batch", responses={200: {"model": List[Recommendation]}})
+async def predict_batch(samples: List[SoilSample]) -> FastJSONResponse:
+    if model is None:
+        raise HTTPException(status_code=500, detail=f"Model not loaded: {model_load_error}")
+    if not samples:
+        return FastJSONResponse([])
+
+    # Predict N requirement for all samples in a single model call
+    try:
+        n_need_preds = predict_n_need(encode_samples(samples))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}")
+
+    return FastJSONResponse([
+        build_recommendation(sample, n_need_pred)
+        for sample, n_need_pred in zip(samples, n_need_preds.tolist())
+    ])
 
 
 if __name__ == "__main__":
     try:
         import uvicorn
     except Exception:
-        raise SystemExit("uvicorn is required to run the API locally: pip install uvicorn fastapi")
-    uvicorn.run("src.api_fastapi:app", host="0.0.0.0", port=8000, reload=False)
+        raise SystemExit("uvicorn is required to run the API locally: pip install 'uvicorn[standard]' fastapi")
+    # One worker process per core: prediction is CPU-bound and holds the GIL
+    uvicorn.run(
+        "src.api_fastapi:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+    )
@@ -4,6 +4,7 @@ Generate synthetic soil testing data for the Sustainable Agriculture Recommender
 Creates 500 soil samples with realistic agricultural parameters.
 """
 
+import functools
 import pandas as pd
 import numpy as np
 import os
@@ -14,6 +15,9 @@ def generate_synthetic_soil_data(n_samples=500, random_seed=42):
     """
     Generate synthetic soil testing data.
     
+    Results are memoized per (n_samples, random_seed); each call returns a fresh
+    copy, so callers may modify it freely.
+    
     Args:
         n_samples (int): Number of soil samples to generate
         random_seed (int): Random seed for reproducibility
@@ -21,55 +25,61 @@ def generate_synthetic_soil_data(n_samples=500, random_seed=42):
     Returns:
         pd.DataFrame: DataFrame containing synthetic soil data
     """
-    # Set random seed for reproducibility
-    np.random.seed(random_seed)
+    return _cached_generate(n_samples, random_seed).copy()
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_generate(n_samples, random_seed):
+    """Build the synthetic dataset for generate_synthetic_soil_data (cached)."""
+    # Seeded PCG64 generator for reproducibility
+    rng = np.random.default_rng(random_seed)
     
     # Generate sample IDs
-    sample_ids = [f"SOIL_{i:04d}" for i in range(1, n_samples + 1)]
+    sample_ids = np.char.add("SOIL_", np.char.zfill(np.arange(1, n_samples + 1).astype(str), 4))
     
-    # Generate realistic soil parameters
+    # Generate realistic soil parameters (clipped and rounded in place)
     # pH: typically ranges from 4.5 to 8.5 for agricultural soils
-    ph_values = np.random.normal(6.5, 1.0, n_samples)
-    ph_values = np.clip(ph_values, 4.5, 8.5)
+    ph_values = rng.normal(6.5, 1.0, n_samples)
+    np.round(np.clip(ph_values, 4.5, 8.5, out=ph_values), 2, out=ph_values)
     
     # Nitrogen (N) in mg/kg - typical range 10-200
-    nitrogen = np.random.normal(80, 40, n_samples)
-    nitrogen = np.clip(nitrogen, 10, 200)
+    nitrogen = rng.normal(80, 40, n_samples)
+    np.round(np.clip(nitrogen, 10, 200, out=nitrogen), 1, out=nitrogen)
     
     # Phosphorus (P) in mg/kg - typical range 5-100
-    phosphorus = np.random.normal(30, 20, n_samples)
-    phosphorus = np.clip(phosphorus, 5, 100)
+    phosphorus = rng.normal(30, 20, n_samples)
+    np.round(np.clip(phosphorus, 5, 100, out=phosphorus), 1, out=phosphorus)
     
     # Potassium (K) in mg/kg - typical range 50-300
-    potassium = np.random.normal(150, 60, n_samples)
-    potassium = np.clip(potassium, 50, 300)
+    potassium = rng.normal(150, 60, n_samples)
+    np.round(np.clip(potassium, 50, 300, out=potassium), 1, out=potassium)
     
     # Organic carbon in % - typical range 0.5-5.0
-    organic_carbon = np.random.normal(2.0, 1.0, n_samples)
-    organic_carbon = np.clip(organic_carbon, 0.5, 5.0)
+    organic_carbon = rng.normal(2.0, 1.0, n_samples)
+    np.round(np.clip(organic_carbon, 0.5, 5.0, out=organic_carbon), 2, out=organic_carbon)
     
     # Moisture content in % - typical range 10-40
-    moisture = np.random.normal(25, 8, n_samples)
-    moisture = np.clip(moisture, 10, 40)
+    moisture = rng.normal(25, 8, n_samples)
+    np.round(np.clip(moisture, 10, 40, out=moisture), 1, out=moisture)
     
     # Crop types with realistic distribution
     crops = ['wheat', 'corn', 'soybeans', 'rice', 'cotton', 'vegetables', 'fruits', 'legumes']
     crop_weights = [0.25, 0.20, 0.15, 0.10, 0.10, 0.10, 0.05, 0.05]  # Realistic crop distribution
-    crop_values = np.random.choice(crops, n_samples, p=crop_weights)
+    crop_values = rng.choice(crops, n_samples, p=crop_weights)
     
-    # Create DataFrame
+    # Create DataFrame from the already-rounded arrays
     data = {
         'sample_id': sample_ids,
-        'pH': np.round(ph_values, 2),
-        'N': np.round(nitrogen, 1),
-        'P': np.round(phosphorus, 1),
-        'K': np.round(potassium, 1),
-        'organic_carbon': np.round(organic_carbon, 2),
-        'moisture': np.round(moisture, 1),
+        'pH': ph_values,
+        'N': nitrogen,
+        'P': phosphorus,
+        'K': potassium,
+        'organic_carbon': organic_carbon,
+        'moisture': moisture,
         'crop': crop_values
     }
     
-    df = pd.DataFrame(data)
+    df = pd.DataFrame(data, copy=False)
     
     return df
 
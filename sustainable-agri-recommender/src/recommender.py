@@ -12,9 +12,39 @@ and general crop requirements. It serves as a starting point for more sophistica
 ML-based recommendation systems.
 """
 
-from typing import Dict, Tuple, Optional
+from typing import Any, Dict, Optional, Set, Tuple
 import warnings
 
+import numpy as np
+import pandas as pd
+
+
+# mg/kg to kg/ha for 0-20cm soil depth and 1.4 g/cm³ bulk density
+MG_KG_TO_KG_HA = 2.8
+
+# Unknown crops already reported, so each one warns once per process
+_warned: Set[str] = set()
+
+
+def _warn_unknown_crop(crop: str) -> None:
+    """Warn that a crop falls back to default targets, once per (lowercased) crop."""
+    crop_lower = crop.lower()
+    if crop_lower not in _warned:
+        _warned.add(crop_lower)
+        warnings.warn(f"Crop '{crop}' not found in specific targets. Using default values.")
+
+
+# pH warning templates, formatted only when the corresponding threshold is crossed
+_LOW_WARN = (
+    "⚠️  WARNING: Low pH ({ph:.1f}) detected. "
+    "Consider lime application to raise pH before fertilizer application. "
+    "Low pH can reduce nutrient availability and crop response to fertilizers."
+)
+_HIGH_WARN = (
+    "⚠️  WARNING: High pH ({ph:.1f}) detected. "
+    "Consider sulfur application to lower pH if needed. "
+    "High pH can reduce micronutrient availability."
+)
 
 class BaselineFertilizerRecommender:
     """
@@ -62,6 +92,9 @@ class BaselineFertilizerRecommender:
             }
         }
         
+        # Normalize keys up-front so lookups only need to lowercase the query
+        self.crop_targets = {crop.lower(): targets for crop, targets in self.crop_targets.items()}
+        
         # Default targets for crops not in the specific list
         self.default_targets = {
             'N': 100,  # kg/ha
@@ -79,6 +112,28 @@ class BaselineFertilizerRecommender:
             'P': 0.3,  # 30% efficiency for phosphorus
             'K': 0.7   # 70% efficiency for potassium
         }
+        
+        # Precomputed [N, P, K] arrays for the per-row hot path. Targets are pre-divided
+        # by efficiency and current levels are scaled by conversion / efficiency, so
+        # need = max(0, target - current * conversion) / efficiency is a single fused step.
+        eff = np.array(
+            [self.npk_efficiency['N'], self.npk_efficiency['P'], self.npk_efficiency['K']],
+            dtype=np.float64
+        )
+        self._target_arr = {
+            crop: np.array([targets['N'], targets['P'], targets['K']], dtype=np.float64) / eff
+            for crop, targets in self.crop_targets.items()
+        }
+        self._default_target_arr = np.array(
+            [self.default_targets['N'], self.default_targets['P'], self.default_targets['K']],
+            dtype=np.float64
+        ) / eff
+        self._cur_coef = MG_KG_TO_KG_HA / eff
+        
+        # Same targets as one (n_crops + 1, 3) table indexed by crop id for whole-frame
+        # lookups; the last row holds the defaults for unknown crops
+        self._crop_ids = {crop: crop_id for crop_id, crop in enumerate(self._target_arr)}
+        self._target_table = np.vstack([*self._target_arr.values(), self._default_target_arr])
     
     def get_crop_targets(self, crop: str) -> Dict[str, float]:
         """
@@ -90,13 +145,11 @@ class BaselineFertilizerRecommender:
         Returns:
             Dict[str, float]: Target NPK levels in kg/ha
         """
-        crop_lower = crop.lower()
-        
-        if crop_lower in self.crop_targets:
-            return self.crop_targets[crop_lower]
-        else:
-            warnings.warn(f"Crop '{crop}' not found in specific targets. Using default values.")
+        targets = self.crop_targets.get(crop.lower())
+        if targets is None:
+            _warn_unknown_crop(crop)
             return self.default_targets
+        return targets
     
     def calculate_npk_deficiency(self, current_npk: Dict[str, float], 
                                 target_npk: Dict[str, float]) -> Dict[str, float]:
@@ -113,7 +166,7 @@ class BaselineFertilizerRecommender:
         # Convert mg/kg to kg/ha (assuming 0-20cm soil depth and 1.4 g/cm³ bulk density)
         # 1 ha = 10,000 m², depth = 0.2 m, bulk density = 1.4 g/cm³ = 1,400 kg/m³
         # Conversion factor = 10,000 × 0.2 × 1,400 / 1,000,000 = 2.8
-        conversion_factor = 2.8
+        conversion_factor = MG_KG_TO_KG_HA
         
         deficiency = {}
         for nutrient in ['N', 'P', 'K']:
@@ -125,7 +178,8 @@ class BaselineFertilizerRecommender:
         
         return deficiency
     
-    def adjust_for_ph(self, recommendations: Dict[str, float], ph: float) -> Tuple[Dict[str, float], str]:
+    def adjust_for_ph(self, recommendations: Dict[str, float],
+                      ph: float) -> Tuple[Dict[str, float], Optional[str]]:
         """
         Adjust recommendations based on pH levels and provide warnings.
         
@@ -134,30 +188,27 @@ class BaselineFertilizerRecommender:
             ph (float): Soil pH value
             
         Returns:
-            Tuple[Dict[str, float], str]: Adjusted recommendations and pH warning
+            Tuple[Dict[str, float], Optional[str]]: Adjusted recommendations and pH
+                warning, or None when pH is within the normal range
         """
         adjusted_recs = recommendations.copy()
-        ph_warning = ""
+        ph_warning = None
         
         if ph < self.ph_warning_low:
-            ph_warning = f"⚠️  WARNING: Low pH ({ph:.1f}) detected. "
-            ph_warning += "Consider lime application to raise pH before fertilizer application. "
-            ph_warning += "Low pH can reduce nutrient availability and crop response to fertilizers."
+            ph_warning = _LOW_WARN.format(ph=ph)
             
             # Reduce P recommendation for low pH (P becomes less available)
             adjusted_recs['P'] = adjusted_recs['P'] * 1.3
             
         elif ph > self.ph_warning_high:
-            ph_warning = f"⚠️  WARNING: High pH ({ph:.1f}) detected. "
-            ph_warning += "Consider sulfur application to lower pH if needed. "
-            ph_warning += "High pH can reduce micronutrient availability."
+            ph_warning = _HIGH_WARN.format(ph=ph)
             
             # Reduce P recommendation for high pH (P becomes less available)
             adjusted_recs['P'] = adjusted_recs['P'] * 1.2
         
         return adjusted_recs, ph_warning
     
-    def recommend_for_row(self, row: Dict) -> Dict[str, float]:
+    def recommend_for_row(self, row: Dict) -> Dict[str, Any]:
         """
         Generate fertilizer recommendations for a single soil sample.
         
@@ -170,45 +221,78 @@ class BaselineFertilizerRecommender:
                        - 'pH': Soil pH value
                        
         Returns:
-            Dict[str, float]: Fertilizer recommendations with keys:
+            Dict[str, Any]: Fertilizer recommendations with keys:
                              - 'N_need_kg_ha': Nitrogen needed (kg/ha)
                              - 'P_need_kg_ha': Phosphorus needed (kg/ha)
                              - 'K_need_kg_ha': Potassium needed (kg/ha)
-                             - 'ph_warning': pH-based warning message
+                             - 'ph_warning': pH-based warning message, or None
+                               when pH is within the normal range
         """
-        # Extract data from row
         crop = row.get('crop', 'unknown')
-        current_npk = {
-            'N': row.get('N', 0),
-            'P': row.get('P', 0),
-            'K': row.get('K', 0)
-        }
         ph = row.get('pH', 7.0)
         
-        # Get target NPK levels for the crop
-        target_npk = self.get_crop_targets(crop)
+        current = np.array([row.get('N', 0), row.get('P', 0), row.get('K', 0)], dtype=np.float64)
         
-        # Calculate NPK deficiency
-        deficiency = self.calculate_npk_deficiency(current_npk, target_npk)
+        target = self._target_arr.get(crop.lower())
+        if target is None:
+            _warn_unknown_crop(crop)
+            target = self._default_target_arr
         
-        # Adjust for pH and get warnings
-        adjusted_recommendations, ph_warning = self.adjust_for_ph(deficiency, ph)
+        # Efficiency-adjusted deficiency in kg/ha (see calculate_npk_deficiency);
+        # fmax keeps max(0, nan) == 0 for missing nutrient readings
+        needs = np.fmax(0.0, target - current * self._cur_coef)
         
-        # Apply efficiency factors to get final application rates
-        final_recommendations = {}
-        for nutrient in ['N', 'P', 'K']:
-            if adjusted_recommendations[nutrient] > 0:
-                # Account for fertilizer efficiency
-                final_recommendations[f'{nutrient}_need_kg_ha'] = (
-                    adjusted_recommendations[nutrient] / self.npk_efficiency[nutrient]
-                )
-            else:
-                final_recommendations[f'{nutrient}_need_kg_ha'] = 0.0
+        # Adjust P for pH and get warnings (None when pH is within range)
+        ph_warning = None
+        if ph < self.ph_warning_low:
+            needs[1] *= 1.3
+            ph_warning = _LOW_WARN.format(ph=ph)
+        elif ph > self.ph_warning_high:
+            needs[1] *= 1.2
+            ph_warning = _HIGH_WARN.format(ph=ph)
+        
+        n_need, p_need, k_need = needs.tolist()
+        
+        return {
+            'N_need_kg_ha': n_need,
+            'P_need_kg_ha': p_need,
+            'K_need_kg_ha': k_need,
+            'ph_warning': ph_warning
+        }
+    
+    def recommend_for_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Generate fertilizer recommendations for every soil sample in a DataFrame.
+        
+        Vectorized equivalent of calling recommend_for_row on each row: the same
+        target lookup, deficiency, pH adjustment and efficiency rules are applied
+        as whole-column NumPy operations. pH warning messages are not produced.
+        
+        Args:
+            df (pd.DataFrame): Soil samples with 'crop', 'N', 'P', 'K' and 'pH' columns
+            
+        Returns:
+            pd.DataFrame: Columns 'N_need_kg_ha', 'P_need_kg_ha' and 'K_need_kg_ha',
+                          aligned with the index of ``df``
+        """
+        crops = df['crop'].astype(str).str.lower()
+        for crop in sorted(set(crops.unique()) - set(self.crop_targets)):
+            _warn_unknown_crop(crop)
+        
+        # One gather from the target table replaces a per-nutrient crop lookup
+        crop_ids = crops.map(self._crop_ids).fillna(len(self._crop_ids)).to_numpy(dtype=np.int64)
+        current = df[['N', 'P', 'K']].to_numpy(dtype=np.float64)
+        needs = np.fmax(0.0, self._target_table[crop_ids] - current * self._cur_coef)
         
-        # Add pH warning to recommendations
-        final_recommendations['ph_warning'] = ph_warning
+        # Adjust P for pH
+        ph = df['pH'].to_numpy(dtype=np.float64)
+        needs[:, 1] *= np.where(
+            ph < self.ph_warning_low, 1.3, np.where(ph > self.ph_warning_high, 1.2, 1.0)
+        )
         
-        return final_recommendations
+        return pd.DataFrame(
+            needs, index=df.index, columns=['N_need_kg_ha', 'P_need_kg_ha', 'K_need_kg_ha']
+        )
     
     def get_recommendation_summary(self, recommendations: Dict[str, float]) -> str:
         """
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Tests for the FastAPI service and the training feature encoding it mirrors.
+"""
+
+import importlib.util
+import shutil
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+from unittest import mock
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+
+# Add project root to path for src.* imports
+sys.path.insert(0, str(ROOT))
+
+from src import api_fastapi  # noqa: E402
+from src.generate_synthetic_data import generate_synthetic_soil_data  # noqa: E402
+from src.recommender import BaselineFertilizerRecommender  # noqa: E402
+from src.train_model import (  # noqa: E402
+    NUMERIC_FEATURE_COLUMNS,
+    add_target_columns_using_recommender,
+    build_features_and_target,
+    derive_feature_columns,
+    export_model_to_onnx,
+    export_model_to_shared_library,
+    train_gradient_boosting_regressor,
+)
+
+# Shared read-only request payload
+WHEAT_SAMPLE = MappingProxyType({
+    'pH': 6.2, 'N': 20.0, 'P': 18.0, 'K': 95.0, 'organic_carbon': 1.1, 'moisture': 22.0, 'crop': 'wheat'
+})
+LOW_PH_SAMPLE = MappingProxyType({**WHEAT_SAMPLE, 'pH': 5.0, 'crop': 'rice'})
+UNKNOWN_CROP_SAMPLE = MappingProxyType({**WHEAT_SAMPLE, 'crop': 'unknown_crop'})
+
+
+def make_training_frame(n_samples: int = 200) -> pd.DataFrame:
+    """Synthetic soil samples with the recommender-derived target columns."""
+    return add_target_columns_using_recommender(
+        generate_synthetic_soil_data(n_samples=n_samples, random_seed=7)
+    )
+
+
+class TestFeatureEncoding(unittest.TestCase):
+    """Test that the float32 feature matrix matches pandas one-hot encoding."""
+
+    def test_features_match_get_dummies(self):
+        """Test build_features_and_target and derive_feature_columns against pd.get_dummies."""
+        df = make_training_frame()
+        crops = sorted(df['crop'].unique())
+
+        features, target = build_features_and_target(df, crops)
+
+        expected = pd.get_dummies(
+            df[NUMERIC_FEATURE_COLUMNS + ['crop']], columns=['crop'], drop_first=True
+        )
+        self.assertEqual(derive_feature_columns(crops), list(expected.columns))
+        self.assertEqual(features.dtype, np.float32)
+        np.testing.assert_array_equal(features, expected.to_numpy(dtype=np.float32))
+        np.testing.assert_array_equal(target, df['N_need'].to_numpy())
+
+
+class TestFertilizerAPI(unittest.TestCase):
+    """Test the /predict and /predict_batch endpoints against a freshly trained model."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Train a small model into a temp dir and start the app so its lifespan loads it."""
+        df = make_training_frame()
+        cls.crops = sorted(df['crop'].unique())
+        features, target = build_features_and_target(df, cls.crops)
+        cls.model = train_gradient_boosting_regressor(features, target)
+
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(cls.tmpdir.name)
+        joblib.dump(
+            {'model': cls.model, 'feature_columns': derive_feature_columns(cls.crops), 'crops': cls.crops},
+            tmp / 'rf_baseline.pkl',
+        )
+
+        # Point the API at the temp bundle; the ONNX/compiled paths do not exist there,
+        # so scoring goes through the scikit-learn model
+        cls.original_paths = (
+            api_fastapi.MODEL_PATH, api_fastapi.ONNX_MODEL_PATH, api_fastapi.COMPILED_MODEL_PATH
+        )
+        api_fastapi.MODEL_PATH = tmp / 'rf_baseline.pkl'
+        api_fastapi.ONNX_MODEL_PATH = tmp / 'rf_baseline.onnx'
+        api_fastapi.COMPILED_MODEL_PATH = tmp / 'rf_baseline.so'
+
+        cls.client = TestClient(api_fastapi.app)
+        cls.client.__enter__()
+        cls.recommender = BaselineFertilizerRecommender()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+        (api_fastapi.MODEL_PATH, api_fastapi.ONNX_MODEL_PATH,
+         api_fastapi.COMPILED_MODEL_PATH) = cls.original_paths
+        cls.tmpdir.cleanup()
+
+    def expected_n_need(self, sample) -> float:
+        """ML N prediction for a sample, encoded the same way as the training data."""
+        row = pd.DataFrame([{**sample, 'crop': sample['crop'].lower(), 'N_need': 0.0}])
+        features, _ = build_features_and_target(row, self.crops)
+        return max(0.0, float(self.model.predict(features)[0]))
+
+    def test_lifespan_loads_model(self):
+        """Test that startup loads the bundle into module state."""
+        self.assertIsNotNone(api_fastapi.model)
+        self.assertIsNone(api_fastapi.model_load_error)
+        self.assertIsNone(api_fastapi.onnx_session)
+        self.assertIsNone(api_fastapi.compiled_predictor)
+        self.assertEqual(list(api_fastapi.CROP_IDS), self.crops)
+        self.assertEqual(api_fastapi.CROP_MATRIX.shape, (len(self.crops), len(derive_feature_columns(self.crops))))
+        self.assertEqual(self.client.get('/').json(), {'status': 'ok', 'model_loaded': True})
+
+    def test_predict(self):
+        """Test that /predict combines the ML N need with baseline P/K needs."""
+        response = self.client.post('/predict', json=dict(WHEAT_SAMPLE))
+        self.assertEqual(response.status_code, 200)
+
+        body = response.json()
+        baseline = self.recommender.recommend_for_row(dict(WHEAT_SAMPLE))
+        self.assertAlmostEqual(body['N_need'], self.expected_n_need(WHEAT_SAMPLE), places=6)
+        self.assertAlmostEqual(body['P_need'], baseline['P_need_kg_ha'])
+        self.assertAlmostEqual(body['K_need'], baseline['K_need_kg_ha'])
+        self.assertIsNone(body['ph_warning'])
+
+    def test_predict_crop_is_case_insensitive(self):
+        """Test that crop names are matched regardless of case."""
+        # Rice has a higher N target than the reference crop, so a missed lookup shows up in N_need
+        lower = self.client.post('/predict', json=dict(LOW_PH_SAMPLE)).json()
+        upper = self.client.post('/predict', json={**LOW_PH_SAMPLE, 'crop': 'Rice'}).json()
+        reference = self.client.post('/predict', json={**LOW_PH_SAMPLE, 'crop': self.crops[0]}).json()
+        self.assertEqual(lower, upper)
+        self.assertNotAlmostEqual(upper['N_need'], reference['N_need'], places=1)
+
+    def test_predict_batch_matches_predict(self):
+        """Test that /predict_batch returns the /predict result for each sample, in order."""
+        samples = [dict(WHEAT_SAMPLE), dict(LOW_PH_SAMPLE), dict(UNKNOWN_CROP_SAMPLE)]
+
+        response = self.client.post('/predict_batch', json=samples)
+        self.assertEqual(response.status_code, 200)
+
+        batch = response.json()
+        self.assertEqual(len(batch), len(samples))
+        for sample, rec in zip(samples, batch):
+            with self.subTest(crop=sample['crop'], pH=sample['pH']):
+                single = self.client.post('/predict', json=sample).json()
+                self.assertAlmostEqual(rec['N_need'], single['N_need'], places=6)
+                self.assertEqual(
+                    (rec['P_need'], rec['K_need'], rec['ph_warning']),
+                    (single['P_need'], single['K_need'], single['ph_warning'])
+                )
+        self.assertIn("Low pH", batch[1]['ph_warning'])
+
+    def test_predict_batch_empty(self):
+        """Test that an empty batch returns an empty list."""
+        response = self.client.post('/predict_batch', json=[])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_predict_batch_unknown_crop(self):
+        """Test that unseen crops score as the reference crop with default P/K targets."""
+        response = self.client.post('/predict_batch', json=[dict(UNKNOWN_CROP_SAMPLE)])
+        self.assertEqual(response.status_code, 200)
+
+        rec = response.json()[0]
+        reference_sample = {**UNKNOWN_CROP_SAMPLE, 'crop': self.crops[0]}
+        baseline = self.recommender.recommend_for_row(dict(UNKNOWN_CROP_SAMPLE))
+        self.assertAlmostEqual(rec['N_need'], self.expected_n_need(reference_sample), places=6)
+        self.assertAlmostEqual(rec['P_need'], baseline['P_need_kg_ha'])
+        self.assertAlmostEqual(rec['K_need'], baseline['K_need_kg_ha'])
+
+
+class StubCompiledPredictor:
+    """Stand-in for tl2cgen.Predictor: returns (n_samples, 1, 1) like the real one."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, dmatrix):
+        return self.model.predict(dmatrix).reshape(-1, 1, 1)
+
+
+class StubOnnxSession:
+    """Stand-in for onnxruntime.InferenceSession: expects the 'input' feed, returns (n_samples, 1)."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def run(self, output_names, input_feed):
+        (features,) = input_feed.values()
+        assert list(input_feed) == ['input'], f"unexpected ONNX inputs: {list(input_feed)}"
+        return [self.model.predict(features).astype(np.float32).reshape(-1, 1)]
+
+
+class TestPredictionBackends(unittest.TestCase):
+    """Test that the compiled and ONNX branches of predict_n_need match model.predict."""
+
+    @classmethod
+    def setUpClass(cls):
+        df = make_training_frame()
+        crops = sorted(df['crop'].unique())
+        features, target = build_features_and_target(df, crops)
+        cls.model = train_gradient_boosting_regressor(features, target)
+        cls.features = features[:25]
+        cls.expected = cls.model.predict(cls.features)
+        cls.tmpdir = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def predict_with(self, compiled_predictor=None, onnx_session=None, tl2cgen=None):
+        """Run predict_n_need with the given backends swapped into the API module."""
+        with mock.patch.multiple(
+            api_fastapi,
+            model=self.model,
+            compiled_predictor=compiled_predictor,
+            onnx_session=onnx_session,
+            tl2cgen=tl2cgen or api_fastapi.tl2cgen,
+        ):
+            return api_fastapi.predict_n_need(self.features)
+
+    def test_compiled_branch_flattens_output(self):
+        """Test the compiled branch with a stub predictor returning (n, 1, 1)."""
+        preds = self.predict_with(
+            compiled_predictor=StubCompiledPredictor(self.model),
+            tl2cgen=SimpleNamespace(DMatrix=lambda features: features),
+        )
+        self.assertEqual(preds.shape, self.expected.shape)
+        np.testing.assert_allclose(preds, self.expected)
+
+    def test_onnx_branch_uses_input_name(self):
+        """Test the ONNX branch with a stub session that checks the feed name."""
+        preds = self.predict_with(onnx_session=StubOnnxSession(self.model))
+        self.assertEqual(preds.shape, self.expected.shape)
+        np.testing.assert_allclose(preds, self.expected, rtol=1e-5)
+
+    def test_compiled_backend_matches_model(self):
+        """Test a real Treelite/TL2cgen build of the model against model.predict."""
+        if api_fastapi.tl2cgen is None or importlib.util.find_spec('treelite') is None:
+            self.skipTest("treelite/tl2cgen not installed")
+        if shutil.which('gcc') is None:
+            self.skipTest("gcc not available")
+
+        libpath = Path(self.tmpdir.name) / 'model.so'
+        self.assertTrue(export_model_to_shared_library(self.model, libpath))
+        predictor = api_fastapi.tl2cgen.Predictor(str(libpath), nthread=1)
+
+        preds = self.predict_with(compiled_predictor=predictor)
+        self.assertEqual(preds.shape, self.expected.shape)
+        np.testing.assert_allclose(preds, self.expected, rtol=1e-5, atol=1e-6)
+
+    def test_onnx_backend_matches_model(self):
+        """Test a real skl2onnx export of the model run through onnxruntime."""
+        if api_fastapi.ort is None or importlib.util.find_spec('skl2onnx') is None:
+            self.skipTest("skl2onnx/onnxruntime not installed")
+
+        onnx_path = Path(self.tmpdir.name) / 'model.onnx'
+        self.assertTrue(export_model_to_onnx(self.model, self.features.shape[1], onnx_path))
+        session = api_fastapi.ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+
+        preds = self.predict_with(onnx_session=session)
+        self.assertEqual(preds.shape, self.expected.shape)
+        np.testing.assert_allclose(preds, self.expected, rtol=1e-4, atol=1e-4)
+
+
+if __name__ == '__main__':
+    # Run tests
+    pytest.main([__file__])
@@ -2,12 +2,26 @@
 Basic tests for the Sustainable Agriculture Recommender project.
 """
 
+import importlib.util
+import tempfile
 import unittest
 import sys
 import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+SRC = ROOT / 'src'
 
 # Add src to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, str(SRC))
+
+REQUIRED_DIRS = ('src', 'data', 'data/raw', 'results', 'notebooks', 'tests')
+REQUIRED_FILES = ('README.md', 'project_goal.md', 'requirements.txt', '.gitignore', 'LICENSE')
 
 
 class TestBasicFunctionality(unittest.TestCase):
@@ -15,29 +29,21 @@ class TestBasicFunctionality(unittest.TestCase):
     
     def test_imports(self):
         """Test that basic imports work."""
-        try:
-            import numpy as np
-            import pandas as pd
-            import sklearn
-            self.assertTrue(True, "Basic imports successful")
-        except ImportError as e:
-            self.fail(f"Failed to import required packages: {e}")
+        for package in ['numpy', 'pandas', 'sklearn']:
+            self.assertIsNotNone(
+                importlib.util.find_spec(package),
+                f"Failed to import required package: {package}"
+            )
     
     def test_project_structure(self):
         """Test that project structure is correct."""
-        project_root = os.path.join(os.path.dirname(__file__), '..')
-        
         # Check required directories exist
-        required_dirs = ['src', 'data', 'data/raw', 'results', 'notebooks', 'tests']
-        for dir_name in required_dirs:
-            dir_path = os.path.join(project_root, dir_name)
-            self.assertTrue(os.path.exists(dir_path), f"Directory {dir_name} does not exist")
+        for dir_name in REQUIRED_DIRS:
+            self.assertTrue((ROOT / dir_name).is_dir(), f"Directory {dir_name} does not exist")
         
         # Check required files exist
-        required_files = ['README.md', 'project_goal.md', 'requirements.txt', '.gitignore', 'LICENSE']
-        for file_name in required_files:
-            file_path = os.path.join(project_root, file_name)
-            self.assertTrue(os.path.exists(file_path), f"File {file_name} does not exist")
+        for file_name in REQUIRED_FILES:
+            self.assertTrue((ROOT / file_name).is_file(), f"File {file_name} does not exist")
     
     def test_python_version(self):
         """Test that Python version is compatible."""
@@ -46,25 +52,23 @@ class TestBasicFunctionality(unittest.TestCase):
         self.assertGreaterEqual(version.minor, 8, "Python 3.8+ required")
     
     def test_working_directory(self):
-        """Test that we can read and write to working directory."""
-        test_file = "test_temp_file.txt"
+        """Test that we can read and write a temporary file."""
         test_content = "Test content"
         
+        # Test write (unique file in the system temp dir, safe for parallel runs)
+        with tempfile.NamedTemporaryFile('w+', delete=False, suffix='.txt') as f:
+            f.write(test_content)
+            test_file = f.name
+        
         try:
-            # Test write
-            with open(test_file, 'w') as f:
-                f.write(test_content)
-            
             # Test read
             with open(test_file, 'r') as f:
                 read_content = f.read()
             
             self.assertEqual(read_content, test_content, "File read/write test failed")
-            
         finally:
             # Cleanup
-            if os.path.exists(test_file):
-                os.remove(test_file)
+            os.unlink(test_file)
 
 
 class TestDataStructures(unittest.TestCase):
@@ -72,8 +76,6 @@ class TestDataStructures(unittest.TestCase):
     
     def test_numpy_operations(self):
         """Test basic numpy operations."""
-        import numpy as np
-        
         # Test array creation
         arr = np.array([1, 2, 3, 4, 5])
         self.assertEqual(len(arr), 5, "Array length incorrect")
@@ -86,8 +88,6 @@ class TestDataStructures(unittest.TestCase):
     
     def test_pandas_operations(self):
         """Test basic pandas operations."""
-        import pandas as pd
-        
         # Test DataFrame creation
         data = {'crop': ['wheat', 'corn', 'soybeans'], 'yield': [100, 150, 80]}
         df = pd.DataFrame(data)
@@ -147,4 +147,4 @@ class TestAgriculturalData(unittest.TestCase):
 
 if __name__ == '__main__':
     # Run tests
-    unittest.main(verbosity=2)
+    pytest.main([__file__])
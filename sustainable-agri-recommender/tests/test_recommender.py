@@ -3,102 +3,78 @@
 Tests for the Baseline Fertilizer Recommender system.
 """
 
+import operator
 import unittest
 import sys
-import os
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+import pytest
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+SRC = ROOT / 'src'
 
 # Add src to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, str(SRC))
 
 from recommender import BaselineFertilizerRecommender
 
+# Shared read-only soil samples (recommend_for_row never mutates its input)
+RICE_SAMPLE = MappingProxyType({'crop': 'rice', 'N': 50.0, 'P': 10.0, 'K': 20.0, 'pH': 6.5})
+LOW_PH_SAMPLE = MappingProxyType({**RICE_SAMPLE, 'pH': 5.0})    # Below 5.5 threshold
+HIGH_PH_SAMPLE = MappingProxyType({**RICE_SAMPLE, 'pH': 8.0})   # Above 7.5 threshold
+UNKNOWN_CROP_SAMPLE = MappingProxyType({**RICE_SAMPLE, 'crop': 'unknown_crop'})
+
 
 class TestBaselineFertilizerRecommender(unittest.TestCase):
     """Test cases for the BaselineFertilizerRecommender class."""
     
-    def setUp(self):
-        """Set up test fixtures before each test method."""
-        self.recommender = BaselineFertilizerRecommender()
+    @classmethod
+    def setUpClass(cls):
+        """Set up one shared recommender and the RICE_SAMPLE recommendations; tests only read from them."""
+        cls.recommender = BaselineFertilizerRecommender()
+        cls.rice_recs = cls.recommender.recommend_for_row(RICE_SAMPLE)
     
     def test_rice_sample_recommendations(self):
         """
         Test fertilizer recommendations for a rice sample with specific NPK and pH values.
         
         Test case: rice sample with N=50, P=10, K=20, pH=6.5
-        Expected: N_need_kg_ha >= 0 and no pH warning
+        Expected: N_need_kg_ha >= 0 and no pH warning (None)
         """
-        # Test soil sample data
-        rice_sample = {
-            'crop': 'rice',
-            'N': 50.0,    # mg/kg
-            'P': 10.0,    # mg/kg
-            'K': 20.0,    # mg/kg
-            'pH': 6.5     # pH value
-        }
-        
-        # Get recommendations
-        recommendations = self.recommender.recommend_for_row(rice_sample)
-        
-        # Test that N_need_kg_ha >= 0
-        self.assertGreaterEqual(
-            recommendations['N_need_kg_ha'], 
-            0, 
-            "Nitrogen recommendation should be >= 0"
-        )
-        
-        # Test that P_need_kg_ha >= 0
-        self.assertGreaterEqual(
-            recommendations['P_need_kg_ha'], 
-            0, 
-            "Phosphorus recommendation should be >= 0"
-        )
+        # Recommendations computed once in setUpClass
+        recommendations = self.rice_recs
         
-        # Test that K_need_kg_ha >= 0
-        self.assertGreaterEqual(
-            recommendations['K_need_kg_ha'], 
-            0, 
-            "Potassium recommendation should be >= 0"
+        # Test that N/P/K recommendations are numeric and >= 0 (no dtype forced, so a
+        # non-numeric value yields an object array and fails the dtype check)
+        needs = np.array([
+            recommendations['N_need_kg_ha'],
+            recommendations['P_need_kg_ha'],
+            recommendations['K_need_kg_ha']
+        ])
+        self.assertTrue(np.issubdtype(needs.dtype, np.number), "NPK recommendations should be numeric")
+        np.testing.assert_array_compare(
+            operator.ge, needs, 0.0,
+            err_msg="NPK recommendations should be >= 0", header="Arrays are not greater-equal"
         )
         
-        # Test that pH warning is empty (no pH adjustment needed)
-        self.assertEqual(
+        # Test that there is no pH warning (no pH adjustment needed)
+        self.assertIsNone(
             recommendations['ph_warning'], 
-            "", 
-            "pH warning should be empty for pH=6.5 (within normal range)"
+            "pH warning should be None for pH=6.5 (within normal range)"
         )
         
         # Test that all required keys are present
-        required_keys = ['N_need_kg_ha', 'P_need_kg_ha', 'K_need_ha', 'ph_warning']
+        required_keys = ['N_need_kg_ha', 'P_need_kg_ha', 'K_need_kg_ha', 'ph_warning']
         for key in required_keys:
             self.assertIn(
                 key, 
                 recommendations, 
                 f"Recommendations should contain key: {key}"
             )
-        
-        # Test that recommendations are numeric values
-        self.assertIsInstance(
-            recommendations['N_need_kg_ha'], 
-            (int, float), 
-            "N_need_kg_ha should be numeric"
-        )
-        self.assertIsInstance(
-            recommendations['P_need_kg_ha'], 
-            (int, float), 
-            "P_need_kg_ha should be numeric"
-        )
-        self.assertIsInstance(
-            recommendations['K_need_ha'], 
-            (int, float), 
-            "K_need_ha should be numeric"
-        )
-        
-        # Test that pH warning is a string
-        self.assertIsInstance(
-            recommendations['ph_warning'], 
-            str, 
-            "ph_warning should be a string"
-        )
     
     def test_crop_targets_retrieval(self):
         """Test that crop-specific target NPK levels are correctly retrieved."""
@@ -115,59 +91,106 @@ class TestBaselineFertilizerRecommender(unittest.TestCase):
         self.assertEqual(wheat_targets['K'], 40, "Wheat K target should be 40 kg/ha")
     
     def test_ph_warning_thresholds(self):
-        """Test pH warning thresholds for extreme pH values."""
-        # Test low pH warning
-        low_ph_sample = {
-            'crop': 'rice',
-            'N': 50.0,
-            'P': 10.0,
-            'K': 20.0,
-            'pH': 5.0  # Below 5.5 threshold
-        }
-        low_ph_recs = self.recommender.recommend_for_row(low_ph_sample)
-        self.assertNotEqual(
-            low_ph_recs['ph_warning'], 
-            "", 
-            "Low pH should generate a warning"
-        )
-        self.assertIn("Low pH", low_ph_recs['ph_warning'])
-        
-        # Test high pH warning
-        high_ph_sample = {
-            'crop': 'rice',
-            'N': 50.0,
-            'P': 10.0,
-            'K': 20.0,
-            'pH': 8.0  # Above 7.5 threshold
-        }
-        high_ph_recs = self.recommender.recommend_for_row(high_ph_sample)
-        self.assertNotEqual(
-            high_ph_recs['ph_warning'], 
-            "", 
-            "High pH should generate a warning"
-        )
-        self.assertIn("High pH", high_ph_recs['ph_warning'])
+        """Test pH warnings below, above and within the 5.5-7.5 thresholds."""
+        cases = [
+            (LOW_PH_SAMPLE, "Low pH"),
+            (HIGH_PH_SAMPLE, "High pH"),
+            (RICE_SAMPLE, None),  # Within normal range
+        ]
+        for sample, expected_warning in cases:
+            with self.subTest(pH=sample['pH']):
+                recs = self.recommender.recommend_for_row(sample)
+                if expected_warning is None:
+                    self.assertIsNone(recs['ph_warning'], "Normal pH should not generate a warning")
+                else:
+                    self.assertIn(expected_warning, recs['ph_warning'])
+    
+    def test_adjust_for_ph_matches_row_warnings(self):
+        """Test that adjust_for_ph warns and scales P exactly as recommend_for_row does."""
+        base = {'N': 10.0, 'P': 10.0, 'K': 10.0}
+        cases = [(5.0, 1.3), (8.0, 1.2), (6.5, 1.0)]
+        for ph, p_factor in cases:
+            with self.subTest(pH=ph):
+                adjusted, ph_warning = self.recommender.adjust_for_ph(base, ph)
+                self.assertAlmostEqual(adjusted['P'], base['P'] * p_factor)
+                self.assertEqual(
+                    ph_warning,
+                    self.recommender.recommend_for_row({**RICE_SAMPLE, 'pH': ph})['ph_warning']
+                )
+        self.assertIsNone(self.recommender.adjust_for_ph(base, 6.5)[1])
     
     def test_unknown_crop_defaults(self):
         """Test that unknown crops use default target values."""
-        unknown_crop_sample = {
-            'crop': 'unknown_crop',
-            'N': 50.0,
-            'P': 10.0,
-            'K': 20.0,
-            'pH': 6.5
-        }
-        
         # This should not raise an error and should use default targets
-        recommendations = self.recommender.recommend_for_row(unknown_crop_sample)
+        recommendations = self.recommender.recommend_for_row(UNKNOWN_CROP_SAMPLE)
         
         # Check that recommendations are still generated
         self.assertIn('N_need_kg_ha', recommendations)
         self.assertIn('P_need_kg_ha', recommendations)
-        self.assertIn('K_need_ha', recommendations)
+        self.assertIn('K_need_kg_ha', recommendations)
         self.assertIn('ph_warning', recommendations)
+    
+    def test_missing_nutrient_clamps_to_zero(self):
+        """Test that a NaN nutrient reading yields a zero need, as max(0, nan) did."""
+        sample = {**RICE_SAMPLE, 'N': float('nan')}
 
+        self.assertEqual(self.recommender.recommend_for_row(sample)['N_need_kg_ha'], 0.0)
+        frame_recs = self.recommender.recommend_for_frame(pd.DataFrame([sample]))
+        self.assertEqual(frame_recs.loc[0, 'N_need_kg_ha'], 0.0)
+
+    def test_frame_recommendations_match_rows(self):
+        """Test that recommend_for_frame agrees with recommend_for_row on every sample."""
+        samples = pd.DataFrame({
+            'crop': ['rice', 'Wheat', 'maize', 'unknown_crop', 'sugarcane'],
+            'N': [50.0, 10.0, 80.0, 20.0, 5.0],
+            'P': [10.0, 5.0, 30.0, 8.0, 2.0],
+            'K': [20.0, 100.0, 15.0, 10.0, 1.0],
+            'pH': [6.5, 5.0, 8.0, 7.5, 5.5]
+        })
+        
+        frame_recs = self.recommender.recommend_for_frame(samples)
+        
+        for index, row in samples.iterrows():
+            row_recs = self.recommender.recommend_for_row(row.to_dict())
+            for key in ['N_need_kg_ha', 'P_need_kg_ha', 'K_need_kg_ha']:
+                self.assertAlmostEqual(
+                    frame_recs.loc[index, key],
+                    row_recs[key],
+                    msg=f"{key} mismatch for sample {index}"
+                )
+
+    
+    def test_batch_recommendations(self):
+        """Test vectorized recommendations over many samples against per-row results."""
+        rng = np.random.default_rng(0)
+        n_samples = 1000
+        samples = pd.DataFrame({
+            'crop': rng.choice(['rice', 'wheat', 'maize', 'cotton', 'sugarcane'], n_samples),
+            'N': rng.uniform(0, 150, n_samples),
+            'P': rng.uniform(0, 80, n_samples),
+            'K': rng.uniform(0, 200, n_samples),
+            'pH': rng.uniform(4, 9, n_samples)
+        })
+        
+        recs = self.recommender.recommend_for_frame(samples)
+        
+        # Invariants checked over whole arrays
+        self.assertEqual(len(recs), n_samples)
+        needs = recs[['N_need_kg_ha', 'P_need_kg_ha', 'K_need_kg_ha']].to_numpy()
+        self.assertTrue(np.all(np.isfinite(needs)), "Recommendations should be finite")
+        np.testing.assert_array_compare(
+            operator.ge, needs, 0.0,
+            err_msg="Recommendations should be >= 0", header="Arrays are not greater-equal"
+        )
+        
+        # Spot-check a subset against the per-row implementation
+        subset = samples.iloc[::50]
+        row_needs = np.array([
+            [rec['N_need_kg_ha'], rec['P_need_kg_ha'], rec['K_need_kg_ha']]
+            for rec in map(self.recommender.recommend_for_row, subset.to_dict('records'))
+        ])
+        np.testing.assert_allclose(needs[::50], row_needs)
 
 if __name__ == '__main__':
     # Run tests
-    unittest.main(verbosity=2)
+    pytest.main([__file__])